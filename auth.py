@@ -1,10 +1,18 @@
+import hashlib
 import os
 
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 _bearer = HTTPBearer(auto_error=False)
-_valid_keys: frozenset[str] = frozenset()
+# SHA-256 digests of the configured keys. Presented credentials are hashed
+# before the lookup, so the comparison never runs over attacker-controlled
+# plaintext and the raw keys are not kept in memory.
+_valid_keys: frozenset[bytes] = frozenset()
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.sha256(key.encode()).digest()
 
 
 def load_keys() -> None:
@@ -15,7 +23,7 @@ def load_keys() -> None:
     """
     global _valid_keys
     raw = os.environ.get("IPAM_API_KEY", "")
-    _valid_keys = frozenset(k.strip() for k in raw.split(",") if k.strip())
+    _valid_keys = frozenset(_digest(k.strip()) for k in raw.split(",") if k.strip())
 
 
 def verify_api_key(
@@ -27,7 +35,7 @@ def verify_api_key(
             detail="Server misconfiguration: IPAM_API_KEY is not set",
         )
 
-    if creds is None or creds.credentials not in _valid_keys:
+    if creds is None or _digest(creds.credentials) not in _valid_keys:
         raise HTTPException(
             status_code=401,
             detail="Invalid or missing API key",
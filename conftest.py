@@ -0,0 +1,51 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import dns_names
+from auth import verify_api_key
+from database import Base, get_db
+from main import app
+
+engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    db = TestSession()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[verify_api_key] = lambda: None
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    Base.metadata.create_all(bind=engine)
+    # Zone names are cached per process; drop what earlier tests loaded
+    dns_names._invalidate_zone_names()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+def create_subnet(cidr):
+    resp = client.post("/subnets/", json={"name": cidr, "cidr": cidr})
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def create_ip(subnet_id, address, **fields):
+    resp = client.post("/ip-addresses/", json={"address": address, "subnet_id": subnet_id, **fields})
+    assert resp.status_code == 201
+    return resp.json()["id"]
@@ -0,0 +1,92 @@
+import re
+from functools import lru_cache
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from models import DNSZone
+
+_DNS_LABEL_RE = re.compile(r"^[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?$")
+
+# Two or more valid labels with an optional trailing dot. Valid names are
+# accepted with this single fullmatch; the per-label loop in _check_fqdn only
+# runs to build a precise error message once it has failed.
+_FQDN_RE = re.compile(
+    r"(?:[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+"
+    r"[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.?"
+)
+_fqdn_fullmatch = _FQDN_RE.fullmatch
+
+
+def _check_fqdn(value: str, ctx: str, example: str | None = None) -> None:
+    """Raise ValueError unless value is a valid name of two or more labels.
+
+    ctx names the value at the start of a sentence ("Zone name", "mname").
+    Given an example, errors hint at it instead of naming ctx per label.
+    """
+    if len(value) > 253:
+        raise ValueError(f"{ctx} must be 253 characters or fewer")
+    if _fqdn_fullmatch(value):
+        return
+    # Strip optional trailing dot for validation; callers keep the original
+    labels = value.rstrip(".").split(".")
+    if len(labels) < 2:
+        if example:
+            raise ValueError(f"{ctx} must have at least two labels (e.g. {example})")
+        raise ValueError(f"{ctx} must be a fully qualified domain name with at least two labels")
+    for label in labels:
+        if not _DNS_LABEL_RE.match(label):
+            where = "" if example else f" in {ctx}"
+            raise ValueError(
+                f"Invalid DNS label '{label}'{where}: labels must be 1-63 characters, "
+                "alphanumeric and hyphens only, and cannot start or end with a hyphen"
+            )
+
+
+# Normalised (no trailing dot) zone names, cached so that DNS name membership
+# checks on IP writes don't reload the whole zones table. The version is bumped
+# after every committed zone create/update/delete, which forces a reload. It
+# is per process: the app runs as a single uvicorn worker, and with more than
+# one a worker would not see zone changes made through the others.
+_zone_names_version = 0
+_zone_names_cache: tuple[int, frozenset[str]] | None = None
+
+
+def _invalidate_zone_names() -> None:
+    global _zone_names_version
+    _zone_names_version += 1
+
+
+def _zone_names(db: Session) -> frozenset[str]:
+    global _zone_names_cache
+    if _zone_names_cache is None or _zone_names_cache[0] != _zone_names_version:
+        names = frozenset(name.rstrip(".") for (name,) in db.query(DNSZone.name).all())
+        _zone_names_cache = (_zone_names_version, names)
+    return _zone_names_cache[1]
+
+
+@lru_cache(maxsize=4096)
+def _name_in_zones(normalized: str, version: int) -> bool:
+    # version only keys the cache: results from before a zone change are never
+    # hit again and age out of the LRU. Callers must load the zone set for
+    # that version first (see _dns_name_in_zone).
+    zones = _zone_names_cache[1]
+    labels = normalized.split(".")
+    # Zone names have at least two labels, so the bare TLD is never a candidate
+    return any(".".join(labels[i:]) in zones for i in range(len(labels) - 1))
+
+
+def _dns_name_in_zone(dns_name: str, db: Session) -> bool:
+    """Return True if dns_name is an existing DNS zone or lies within one."""
+    _zone_names(db)
+    return _name_in_zones(dns_name.rstrip("."), _zone_names_version)
+
+
+def _assert_dns_name_in_zone(dns_name: str, db: Session) -> None:
+    """Raise 400 if dns_name is not contained within any existing DNS zone."""
+    if _dns_name_in_zone(dns_name, db):
+        return
+    raise HTTPException(
+        status_code=400,
+        detail=f"DNS name '{dns_name}' does not belong to any existing DNS zone",
+    )
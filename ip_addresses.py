@@ -1,45 +1,22 @@
 import ipaddress
-import re
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
 from pydantic import BaseModel, Field, field_validator
+from pydantic_core import to_json
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import DNSZone, IPAddress, Subnet, _int_to_hex
+from dns_names import _assert_dns_name_in_zone, _check_fqdn
+from models import _IP_RESPONSE_COLUMNS, IPAddress, Subnet, _int_to_hex, _ip_fields, _parse_address
 
 router = APIRouter(prefix="/ip-addresses", tags=["ip-addresses"])
 
 
-def _assert_dns_name_in_zone(dns_name: str, db: Session) -> None:
-    """Raise 400 if dns_name is not contained within any existing DNS zone."""
-    normalized = dns_name.rstrip(".")
-    zones = db.query(DNSZone.name).all()
-    for (zone_name,) in zones:
-        zone = zone_name.rstrip(".")
-        if normalized == zone or normalized.endswith("." + zone):
-            return
-    raise HTTPException(
-        status_code=400,
-        detail=f"DNS name '{dns_name}' does not belong to any existing DNS zone",
-    )
-
-
-_DNS_LABEL_RE = re.compile(r"^[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?$")
-
-
 def _validate_dns_name(name: str) -> str:
-    if len(name) > 253:
-        raise ValueError("DNS name must be 253 characters or fewer")
-    labels = name.rstrip(".").split(".")
-    if len(labels) < 2:
-        raise ValueError("DNS name must have at least two labels (e.g. host.example.com)")
-    for label in labels:
-        if not _DNS_LABEL_RE.match(label):
-            raise ValueError(
-                f"Invalid DNS label '{label}': labels must be 1-63 characters, "
-                "alphanumeric and hyphens only, and cannot start or end with a hyphen"
-            )
+    _check_fqdn(name, "DNS name", "host.example.com")
     return name
 
 
@@ -47,7 +24,9 @@ def _validate_dns_name(name: str) -> str:
 
 
 class IPAddressCreate(BaseModel):
-    address: str = Field(description="IP address in standard dotted-decimal (IPv4) or colon (IPv6) notation")
+    address: ipaddress.IPv4Address | ipaddress.IPv6Address = Field(
+        description="IP address in standard dotted-decimal (IPv4) or colon (IPv6) notation"
+    )
     subnet_id: int = Field(description="ID of the parent subnet; the address must fall within that subnet's range")
     dns_name: str | None = Field(
         None,
@@ -55,14 +34,15 @@ class IPAddressCreate(BaseModel):
     )
     description: str | None = Field(None, description="Optional free-text description")
 
-    @field_validator("address")
+    @field_validator("address", mode="before")
     @classmethod
-    def validate_address(cls, v: str) -> str:
+    def validate_address(cls, v: Any) -> ipaddress.IPv4Address | ipaddress.IPv6Address:
+        if not isinstance(v, str):
+            raise ValueError("Invalid IP address")
         try:
-            ipaddress.ip_address(v)
+            return _parse_address(v)
         except ValueError:
             raise ValueError("Invalid IP address")
-        return v
 
     @field_validator("dns_name")
     @classmethod
@@ -99,14 +79,7 @@ class IPAddressResponse(BaseModel):
 
 
 def _ip_to_response(ip: IPAddress) -> IPAddressResponse:
-    return IPAddressResponse(
-        id=ip.id,
-        address=ip.address_str,
-        subnet_id=ip.subnet_id,
-        is_ipv6=ip.is_ipv6,
-        dns_name=ip.dns_name,
-        description=ip.description,
-    )
+    return IPAddressResponse.model_validate(_ip_fields(ip))
 
 
 # -- Routes -------------------------------------------------------------------
@@ -129,14 +102,14 @@ async def list_ip_addresses(
     offset: int = Query(0, ge=0, description="Number of results to skip for pagination"),
     db: Session = Depends(get_db),
 ):
-    query = db.query(IPAddress)
+    query = db.query(*_IP_RESPONSE_COLUMNS)
 
     if subnet_id is not None:
         query = query.filter(IPAddress.subnet_id == subnet_id)
 
     if address is not None:
         try:
-            addr = ipaddress.ip_address(address)
+            addr = _parse_address(address)
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid IP address")
         query = query.filter(IPAddress.address == _int_to_hex(int(addr)))
@@ -144,7 +117,8 @@ async def list_ip_addresses(
     if dns_name is not None:
         query = query.filter(IPAddress.dns_name == dns_name)
 
-    return [_ip_to_response(ip) for ip in query.offset(offset).limit(limit).all()]
+    rows = query.offset(offset).limit(limit).yield_per(200)
+    return Response(to_json([_ip_fields(row) for row in rows]), media_type="application/json")
 
 
 @router.get(
@@ -153,7 +127,7 @@ async def list_ip_addresses(
     summary="Get IP address by ID",
 )
 async def get_ip_address(ip_address_id: int, db: Session = Depends(get_db)):
-    ip = db.query(IPAddress).filter(IPAddress.id == ip_address_id).first()
+    ip = db.get(IPAddress, ip_address_id)
     if not ip:
         raise HTTPException(status_code=404, detail="IP address not found")
     return _ip_to_response(ip)
@@ -167,31 +141,79 @@ async def get_ip_address(ip_address_id: int, db: Session = Depends(get_db)):
     description="Register a specific IP address within an existing subnet, optionally associating a DNS name.",
 )
 async def create_ip_address(body: IPAddressCreate, db: Session = Depends(get_db)):
-    subnet = db.query(Subnet).filter(Subnet.id == body.subnet_id).first()
+    subnet = db.get(Subnet, body.subnet_id)
     if not subnet:
         raise HTTPException(status_code=404, detail="Parent subnet not found")
 
     if body.dns_name is not None:
         _assert_dns_name_in_zone(body.dns_name, db)
 
-    addr = ipaddress.ip_address(body.address)
-    hex_addr = _int_to_hex(int(addr))
-
-    existing = db.query(IPAddress).filter(IPAddress.address == hex_addr).first()
-    if existing:
-        raise HTTPException(status_code=409, detail=f"IP address {body.address} already exists")
-
     try:
-        ip = IPAddress.from_string(body.address, subnet, body.description, body.dns_name)
+        ip = IPAddress.from_address(body.address, subnet, body.description, body.dns_name)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
     db.add(ip)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"IP address {body.address} already exists")
     db.refresh(ip)
     return _ip_to_response(ip)
 
 
+@router.post(
+    "/bulk",
+    response_model=list[IPAddressResponse],
+    status_code=201,
+    summary="Create IP addresses in bulk",
+    description=(
+        "Register up to 1000 IP addresses in a single transaction. Addresses that are already "
+        "registered are skipped, so a failed import can simply be retried; the response lists "
+        "only the records that were created."
+    ),
+)
+async def create_ip_addresses_bulk(
+    body: list[IPAddressCreate] = Body(max_length=1000, description="IP addresses to create"),
+    db: Session = Depends(get_db),
+):
+    if not body:
+        return []
+
+    subnet_ids = {item.subnet_id for item in body}
+    subnets = {s.id: s for s in db.query(Subnet).filter(Subnet.id.in_(subnet_ids))}
+
+    values = []
+    for item in body:
+        subnet = subnets.get(item.subnet_id)
+        if subnet is None:
+            raise HTTPException(status_code=404, detail=f"Parent subnet {item.subnet_id} not found")
+        if item.dns_name is not None:
+            _assert_dns_name_in_zone(item.dns_name, db)
+        try:
+            ip = IPAddress.from_address(item.address, subnet, item.description, item.dns_name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        values.append(
+            {
+                "address": ip.address,
+                "is_ipv6": ip.is_ipv6,
+                "dns_name": ip.dns_name,
+                "description": ip.description,
+                "subnet_id": ip.subnet_id,
+            }
+        )
+
+    # One multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING; skipped
+    # duplicates simply produce no row
+    stmt = sqlite_insert(IPAddress.__table__).on_conflict_do_nothing().returning(*_IP_RESPONSE_COLUMNS)
+    rows = db.execute(stmt, values).all()
+    db.commit()
+    rows.sort(key=lambda row: row.id)
+    return Response(to_json([_ip_fields(row) for row in rows]), status_code=201, media_type="application/json")
+
+
 @router.put(
     "/{ip_address_id}",
     response_model=IPAddressResponse,
@@ -203,15 +225,19 @@ async def update_ip_address(
     body: IPAddressUpdate,
     db: Session = Depends(get_db),
 ):
-    ip = db.query(IPAddress).filter(IPAddress.id == ip_address_id).first()
+    ip = db.get(IPAddress, ip_address_id)
     if not ip:
         raise HTTPException(status_code=404, detail="IP address not found")
 
-    if body.dns_name is not None:
+    # Clients commonly PUT the full record back; an unchanged name was already
+    # checked against the zones when it was stored
+    if body.dns_name is not None and body.dns_name != ip.dns_name:
         _assert_dns_name_in_zone(body.dns_name, db)
 
     ip.dns_name = body.dns_name
     ip.description = body.description
+    if not db.is_modified(ip):
+        return _ip_to_response(ip)
     db.commit()
     db.refresh(ip)
     return _ip_to_response(ip)
@@ -224,7 +250,7 @@ async def update_ip_address(
     description="Remove an IP address record, freeing it for future allocation.",
 )
 async def delete_ip_address(ip_address_id: int, db: Session = Depends(get_db)):
-    ip = db.query(IPAddress).filter(IPAddress.id == ip_address_id).first()
+    ip = db.get(IPAddress, ip_address_id)
     if not ip:
         raise HTTPException(status_code=404, detail="IP address not found")
 
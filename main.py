@@ -1,9 +1,11 @@
+import os
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import inspect
 
 import auth
 from auth import verify_api_key
@@ -14,12 +16,28 @@ from dns_zones import router as dns_zones_router
 from database import Base, engine
 import models  # noqa: F401 - ensures tables are registered
 
-Base.metadata.create_all(bind=engine)
+
+def _ensure_schema() -> None:
+    """Create any missing tables and indexes; no DDL when the schema is current."""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            table.create(bind=engine)
+            continue
+        # Indexes declared after the table was first created
+        existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=engine)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     load_dotenv()
+    # Deployments that manage the schema themselves can skip this step
+    if os.getenv("IPAM_AUTO_CREATE_SCHEMA", "1").lower() not in ("0", "false", "no"):
+        _ensure_schema()
     auth.load_keys()
     yield
 
@@ -31,10 +49,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-app.include_router(health_router)
-app.include_router(subnets_router, dependencies=[Depends(verify_api_key)])
-app.include_router(ip_addresses_router, dependencies=[Depends(verify_api_key)])
-app.include_router(dns_zones_router, dependencies=[Depends(verify_api_key)])
+
+_ROUTERS = (
+    (health_router, []),
+    (subnets_router, [Depends(verify_api_key)]),
+    (ip_addresses_router, [Depends(verify_api_key)]),
+    (dns_zones_router, [Depends(verify_api_key)]),
+)
+for router, dependencies in _ROUTERS:
+    app.include_router(router, dependencies=dependencies)
 
 
 @app.get("/")
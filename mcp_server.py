@@ -38,6 +38,11 @@ mcp = FastMCP(
 )
 
 
+def _compact(**fields: Any) -> dict[str, Any]:
+    """Return fields without the ones left as None, i.e. not given by the caller."""
+    return {k: v for k, v in fields.items() if v is not None}
+
+
 async def _request(
     method: str,
     path: str,
@@ -48,7 +53,7 @@ async def _request(
     ctx = mcp.get_context()
     client: httpx.AsyncClient = ctx.request_context.lifespan_context["client"]
 
-    clean_params = {k: v for k, v in (params or {}).items() if v is not None} or None
+    clean_params = _compact(**(params or {})) or None
 
     try:
         response = await client.request(method, path, params=clean_params, json=body)
@@ -122,9 +127,7 @@ async def create_subnet(
         cidr: Network in CIDR notation (e.g. "192.168.1.0/24").
         description: Optional free-text description.
     """
-    body: dict[str, Any] = {"name": name, "cidr": cidr}
-    if description is not None:
-        body["description"] = description
+    body = _compact(name=name, cidr=cidr, description=description)
     return await _request("POST", "/subnets/", body=body)
 
 
@@ -143,11 +146,7 @@ async def allocate_next_ip(
         dns_name: Optional DNS name to assign to the new IP address.
         description: Optional free-text description for the new IP address.
     """
-    body: dict[str, Any] = {}
-    if dns_name is not None:
-        body["dns_name"] = dns_name
-    if description is not None:
-        body["description"] = description
+    body = _compact(dns_name=dns_name, description=description)
     return await _request("POST", f"/subnets/{subnet_id}/allocate", body=body or None)
 
 
@@ -213,11 +212,7 @@ async def create_ip_address(
         dns_name: Optional DNS name to assign to this address.
         description: Optional free-text description.
     """
-    body: dict[str, Any] = {"address": address, "subnet_id": subnet_id}
-    if dns_name is not None:
-        body["dns_name"] = dns_name
-    if description is not None:
-        body["description"] = description
+    body = _compact(address=address, subnet_id=subnet_id, dns_name=dns_name, description=description)
     return await _request("POST", "/ip-addresses/", body=body)
 
 
@@ -236,11 +231,7 @@ async def update_ip_address(
         dns_name: New DNS name (pass an empty string to clear it).
         description: New description (pass an empty string to clear it).
     """
-    body: dict[str, Any] = {}
-    if dns_name is not None:
-        body["dns_name"] = dns_name
-    if description is not None:
-        body["description"] = description
+    body = _compact(dns_name=dns_name, description=description)
     return await _request("PUT", f"/ip-addresses/{ip_address_id}", body=body)
 
 
@@ -314,22 +305,10 @@ async def create_dns_zone(
         expire: SOA expire interval in seconds (default: 604800).
         minimum: SOA minimum TTL in seconds (default: 300).
     """
-    soa: dict[str, Any] = {"mname": mname, "rname": rname}
-    if serial is not None:
-        soa["serial"] = serial
-    if refresh is not None:
-        soa["refresh"] = refresh
-    if retry is not None:
-        soa["retry"] = retry
-    if expire is not None:
-        soa["expire"] = expire
-    if minimum is not None:
-        soa["minimum"] = minimum
-
-    body: dict[str, Any] = {"name": name, "soa": soa}
-    if description is not None:
-        body["description"] = description
-
+    soa = _compact(
+        mname=mname, rname=rname, serial=serial, refresh=refresh, retry=retry, expire=expire, minimum=minimum
+    )
+    body = _compact(name=name, soa=soa, description=description)
     return await _request("POST", "/dns-zones/", body=body)
 
 
@@ -362,31 +341,10 @@ async def update_dns_zone(
         expire: New SOA expire interval in seconds.
         minimum: New SOA minimum TTL in seconds.
     """
-    body: dict[str, Any] = {}
-    if name is not None:
-        body["name"] = name
-    if description is not None:
-        body["description"] = description
-
-    soa: dict[str, Any] = {}
-    if mname is not None:
-        soa["mname"] = mname
-    if rname is not None:
-        soa["rname"] = rname
-    if serial is not None:
-        soa["serial"] = serial
-    if refresh is not None:
-        soa["refresh"] = refresh
-    if retry is not None:
-        soa["retry"] = retry
-    if expire is not None:
-        soa["expire"] = expire
-    if minimum is not None:
-        soa["minimum"] = minimum
-
-    if soa:
-        body["soa"] = soa
-
+    soa = _compact(
+        mname=mname, rname=rname, serial=serial, refresh=refresh, retry=retry, expire=expire, minimum=minimum
+    )
+    body = _compact(name=name, description=description, soa=soa or None)
     return await _request("PUT", f"/dns-zones/{zone_id}", body=body)
 
 
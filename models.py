@@ -1,6 +1,8 @@
 import ipaddress
+from functools import cached_property, lru_cache
+from typing import Any
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, Row, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from database import Base
@@ -10,18 +12,67 @@ from database import Base
 # IPv4 example:  "000000000a000001"  (10.0.0.1)
 # IPv6 example:  "20010db8000000000000000000000001"
 _HEX_LEN = 32  # 128 bits / 4 bits per hex char
+_HEX_FORMAT = f"0{_HEX_LEN}x"
 
 
 def _int_to_hex(value: int) -> str:
-    return format(value, f"0{_HEX_LEN}x")
+    return format(value, _HEX_FORMAT)
 
 
 def _hex_to_int(value: str) -> int:
     return int(value, 16)
 
 
+def _parse_address(value: str) -> ipaddress.IPv4Address | ipaddress.IPv6Address:
+    # Same result as ipaddress.ip_address() for strings, but IPv6 input doesn't
+    # pay for a failed IPv4 parse (and the exception) first
+    if ":" in value:
+        return ipaddress.IPv6Address(value)
+    return ipaddress.IPv4Address(value)
+
+
+def _int_to_address_str(value: int, is_ipv6: bool) -> str:
+    if is_ipv6:
+        return str(ipaddress.IPv6Address(value))
+    # Dotted-quad straight from the integer; same text as str(IPv4Address)
+    # without building the object
+    return f"{value >> 24}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+# A stored address never changes its text form, so formatted strings are
+# memoized rather than kept in a second column: repeated listings of the same
+# rows skip the ipaddress round-trip, which dominates per-row serialization.
+@lru_cache(maxsize=16384)
+def _hex_to_address_str(value: str, is_ipv6: bool) -> str:
+    return _int_to_address_str(_hex_to_int(value), is_ipv6)
+
+
+@lru_cache(maxsize=None)
+def _prefix_sizes(prefix_length: int, is_ipv6: bool) -> tuple[str, int, int]:
+    """Netmask string, total and usable host counts for a prefix length."""
+    # Keyed only by prefix: there are at most 33 IPv4 and 129 IPv6 entries
+    bits = 128 if is_ipv6 else 32
+    total = 1 << (bits - prefix_length)
+    usable = total if prefix_length >= (128 if is_ipv6 else 31) else total - 2
+    mask = ((1 << bits) - 1) ^ (total - 1)
+    netmask = str(ipaddress.IPv6Address(mask) if is_ipv6 else ipaddress.IPv4Address(mask))
+    return netmask, total, usable
+
+
 class Subnet(Base):
     __tablename__ = "subnets"
+    # One row per CIDR; create_subnet relies on this to reject duplicates.
+    # is_ipv6 is part of the key because 0.0.0.0/n and ::/n store the same
+    # network_address and prefix_length.
+    __table_args__ = (
+        Index(
+            "ix_subnets_network_address_prefix_length_is_ipv6",
+            "network_address",
+            "prefix_length",
+            "is_ipv6",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
@@ -30,57 +81,88 @@ class Subnet(Base):
     is_ipv6: Mapped[bool] = mapped_column(Boolean, default=False)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
 
+    # No endpoint walks these relationships; accidental lazy loads (the N+1
+    # pattern) raise instead of silently issuing a query per row.
     ip_addresses: Mapped[list["IPAddress"]] = relationship(
-        back_populates="subnet", cascade="all, delete-orphan"
+        back_populates="subnet",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
     )
 
-    @property
+    # A subnet's CIDR cannot change once created, so the network object is
+    # built at most once per instance
+    @cached_property
     def network(self) -> ipaddress.IPv4Network | ipaddress.IPv6Network:
         addr_int = _hex_to_int(self.network_address)
         if self.is_ipv6:
             return ipaddress.IPv6Network((addr_int, self.prefix_length), strict=False)
         return ipaddress.IPv4Network((addr_int, self.prefix_length), strict=False)
 
+    # The response fields below are derived from the stored integer and the
+    # prefix length alone; going through the network object instead costs
+    # several ipaddress constructions per subnet in every listing.
+
     @property
     def network_str(self) -> str:
-        return str(self.network)
+        return f"{_hex_to_address_str(self.network_address, self.is_ipv6)}/{self.prefix_length}"
+
+    @property
+    def _broadcast_int(self) -> int:
+        return _hex_to_int(self.network_address) + self.total_hosts - 1
 
     @property
     def netmask(self) -> str:
-        return str(self.network.netmask)
+        return _prefix_sizes(self.prefix_length, self.is_ipv6)[0]
 
     @property
     def broadcast_address(self) -> str:
-        return str(self.network.broadcast_address)
+        return _int_to_address_str(self._broadcast_int, self.is_ipv6)
 
     @property
     def total_hosts(self) -> int:
-        return self.network.num_addresses
+        return _prefix_sizes(self.prefix_length, self.is_ipv6)[1]
 
     @property
     def usable_hosts(self) -> int:
-        if self.prefix_length >= (128 if self.is_ipv6 else 31):
-            return self.total_hosts
-        return self.total_hosts - 2
+        return _prefix_sizes(self.prefix_length, self.is_ipv6)[2]
 
     @property
     def first_usable(self) -> str:
         if self.prefix_length >= (128 if self.is_ipv6 else 31):
-            return str(self.network.network_address)
-        return str(self.network.network_address + 1)
+            return _hex_to_address_str(self.network_address, self.is_ipv6)
+        return _int_to_address_str(_hex_to_int(self.network_address) + 1, self.is_ipv6)
 
     @property
     def last_usable(self) -> str:
         if self.prefix_length >= (128 if self.is_ipv6 else 31):
-            return str(self.network.broadcast_address)
-        return str(self.network.broadcast_address - 1)
+            return self.broadcast_address
+        return _int_to_address_str(self._broadcast_int - 1, self.is_ipv6)
+
+    # The range allocation hands out. It matches first_usable/last_usable
+    # except for IPv6 /127, where both addresses of the point-to-point link
+    # (RFC 6164) are assignable, as they are for IPv4 /31.
+    @property
+    def usable_start_int(self) -> int:
+        if self.prefix_length >= (127 if self.is_ipv6 else 31):
+            return _hex_to_int(self.network_address)
+        return _hex_to_int(self.network_address) + 1
+
+    @property
+    def usable_end_int(self) -> int:
+        if self.prefix_length >= (127 if self.is_ipv6 else 31):
+            return self._broadcast_int
+        return self._broadcast_int - 1
 
     def contains(self, address: str) -> bool:
         return ipaddress.ip_address(address) in self.network
 
     @classmethod
-    def from_cidr(cls, cidr: str, name: str, description: str | None = None) -> "Subnet":
-        network = ipaddress.ip_network(cidr, strict=False)
+    def from_network(
+        cls,
+        network: ipaddress.IPv4Network | ipaddress.IPv6Network,
+        name: str,
+        description: str | None = None,
+    ) -> "Subnet":
         return cls(
             name=name,
             network_address=_int_to_hex(int(network.network_address)),
@@ -109,6 +191,9 @@ class DNSZone(Base):
 
 class IPAddress(Base):
     __tablename__ = "ip_addresses"
+    # Per-subnet listings and the free-address search in allocate read a
+    # subnet's addresses in order; this serves both straight from the index
+    __table_args__ = (Index("ix_ip_addresses_subnet_id_address", "subnet_id", "address"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     address: Mapped[str] = mapped_column(String(32), nullable=False, unique=True)
@@ -117,7 +202,7 @@ class IPAddress(Base):
     description: Mapped[str | None] = mapped_column(String, nullable=True)
     subnet_id: Mapped[int] = mapped_column(ForeignKey("subnets.id"), nullable=False)
 
-    subnet: Mapped[Subnet] = relationship(back_populates="ip_addresses")
+    subnet: Mapped[Subnet] = relationship(back_populates="ip_addresses", lazy="raise_on_sql")
 
     @property
     def _addr_int(self) -> int:
@@ -125,9 +210,7 @@ class IPAddress(Base):
 
     @property
     def address_str(self) -> str:
-        if self.is_ipv6:
-            return str(ipaddress.IPv6Address(self._addr_int))
-        return str(ipaddress.IPv4Address(self._addr_int))
+        return _hex_to_address_str(self.address, self.is_ipv6)
 
     def offset(self, value: int) -> str:
         new_int = self._addr_int + value
@@ -136,17 +219,16 @@ class IPAddress(Base):
         return str(ipaddress.IPv4Address(new_int))
 
     @classmethod
-    def from_string(
+    def from_address(
         cls,
-        address: str,
+        addr: ipaddress.IPv4Address | ipaddress.IPv6Address,
         subnet: "Subnet",
         description: str | None = None,
         dns_name: str | None = None,
     ) -> "IPAddress":
-        addr = ipaddress.ip_address(address)
         if addr not in subnet.network:
             raise ValueError(
-                f"Address {address} is not within subnet {subnet.network_str}"
+                f"Address {addr} is not within subnet {subnet.network_str}"
             )
         return cls(
             address=_int_to_hex(int(addr)),
@@ -155,3 +237,25 @@ class IPAddress(Base):
             description=description,
             subnet_id=subnet.id,
         )
+
+
+_IP_RESPONSE_COLUMNS = (
+    IPAddress.id,
+    IPAddress.address,
+    IPAddress.subnet_id,
+    IPAddress.is_ipv6,
+    IPAddress.dns_name,
+    IPAddress.description,
+)
+
+
+def _ip_fields(ip: IPAddress | Row) -> dict[str, Any]:
+    """Response fields for an IPAddress or a row selected with _IP_RESPONSE_COLUMNS."""
+    return {
+        "id": ip.id,
+        "address": _hex_to_address_str(ip.address, ip.is_ipv6),
+        "subnet_id": ip.subnet_id,
+        "is_ipv6": ip.is_ipv6,
+        "dns_name": ip.dns_name,
+        "description": ip.description,
+    }
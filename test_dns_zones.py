@@ -1,30 +1,4 @@
-import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-from database import Base, get_db
-from main import app
-
-engine = create_engine(
-    "sqlite:///:memory:",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-def override_get_db():
-    db = TestSession()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-client = TestClient(app)
+from conftest import client
 
 VALID_ZONE = {
     "name": "example.com",
@@ -41,13 +15,6 @@ VALID_ZONE = {
 }
 
 
-@pytest.fixture(autouse=True)
-def setup_db():
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
-
-
 # -- Create -------------------------------------------------------------------
 
 
@@ -94,18 +61,21 @@ def test_create_zone_invalid_name_single_label():
     body = {**VALID_ZONE, "name": "localhost"}
     resp = client.post("/dns-zones/", json=body)
     assert resp.status_code == 422
+    assert "Zone name must have at least two labels (e.g. example.com)" in resp.json()["detail"][0]["msg"]
 
 
 def test_create_zone_invalid_name_bad_chars():
     body = {**VALID_ZONE, "name": "ex ample.com"}
     resp = client.post("/dns-zones/", json=body)
     assert resp.status_code == 422
+    assert "Invalid DNS label 'ex ample': labels" in resp.json()["detail"][0]["msg"]
 
 
 def test_create_zone_invalid_soa_mname():
     body = {**VALID_ZONE, "soa": {**VALID_ZONE["soa"], "mname": "bad"}}
     resp = client.post("/dns-zones/", json=body)
     assert resp.status_code == 422
+    assert "mname must be a fully qualified domain name" in resp.json()["detail"][0]["msg"]
 
 
 def test_create_zone_invalid_serial_negative():
@@ -126,6 +96,31 @@ def test_create_zone_invalid_refresh_zero():
     assert resp.status_code == 422
 
 
+def test_create_zones_bulk():
+    other = {**VALID_ZONE, "name": "other.com", "description": None}
+    resp = client.post("/dns-zones/bulk", json=[VALID_ZONE, other])
+    assert resp.status_code == 201
+    data = resp.json()
+    assert [z["name"] for z in data] == ["example.com", "other.com"]
+    assert data[0]["soa"]["serial"] == 2024010101
+    assert data[1]["description"] is None
+    assert len(client.get("/dns-zones/").json()) == 2
+
+
+def test_create_zones_bulk_duplicate_creates_nothing():
+    client.post("/dns-zones/", json=VALID_ZONE)
+    other = {**VALID_ZONE, "name": "other.com"}
+    resp = client.post("/dns-zones/bulk", json=[other, VALID_ZONE])
+    assert resp.status_code == 409
+    assert len(client.get("/dns-zones/").json()) == 1
+
+
+def test_create_zones_bulk_invalid_item():
+    resp = client.post("/dns-zones/bulk", json=[VALID_ZONE, {**VALID_ZONE, "name": "localhost"}])
+    assert resp.status_code == 422
+    assert client.get("/dns-zones/").json() == []
+
+
 # -- Read ---------------------------------------------------------------------
 
 
@@ -196,6 +191,14 @@ def test_update_zone_soa():
     assert data["soa"]["refresh"] == 7200
 
 
+def test_update_zone_unchanged():
+    create_resp = client.post("/dns-zones/", json=VALID_ZONE)
+    zone_id = create_resp.json()["id"]
+    resp = client.put(f"/dns-zones/{zone_id}", json=VALID_ZONE)
+    assert resp.status_code == 200
+    assert resp.json() == create_resp.json()
+
+
 def test_update_zone_not_found():
     resp = client.put("/dns-zones/999", json={"name": "nope.com"})
     assert resp.status_code == 404
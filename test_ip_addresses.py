@@ -0,0 +1,152 @@
+from conftest import client, create_ip, create_subnet
+
+
+# -- Bulk create --------------------------------------------------------------
+
+
+def create_bulk(items):
+    return client.post("/ip-addresses/bulk", json=items)
+
+
+def list_addresses():
+    return [ip["address"] for ip in client.get("/ip-addresses/").json()]
+
+
+def test_create_bulk():
+    subnet_id = create_subnet("10.0.0.0/24")
+    resp = create_bulk(
+        [
+            {"address": "10.0.0.10", "subnet_id": subnet_id, "description": "web"},
+            {"address": "10.0.0.11", "subnet_id": subnet_id},
+        ]
+    )
+    assert resp.status_code == 201
+    data = resp.json()
+    assert [ip["address"] for ip in data] == ["10.0.0.10", "10.0.0.11"]
+    assert data[0]["description"] == "web"
+    assert data[1]["description"] is None
+    assert list_addresses() == ["10.0.0.10", "10.0.0.11"]
+
+
+def test_create_bulk_empty():
+    resp = create_bulk([])
+    assert resp.status_code == 201
+    assert resp.json() == []
+
+
+def test_create_bulk_skips_existing():
+    subnet_id = create_subnet("10.0.0.0/24")
+    create_ip(subnet_id, "10.0.0.10")
+    resp = create_bulk(
+        [
+            {"address": "10.0.0.10", "subnet_id": subnet_id},
+            {"address": "10.0.0.11", "subnet_id": subnet_id},
+        ]
+    )
+    assert resp.status_code == 201
+    assert [ip["address"] for ip in resp.json()] == ["10.0.0.11"]
+    assert sorted(list_addresses()) == ["10.0.0.10", "10.0.0.11"]
+
+
+def test_create_bulk_skips_duplicates_within_batch():
+    subnet_id = create_subnet("10.0.0.0/24")
+    item = {"address": "10.0.0.10", "subnet_id": subnet_id}
+    resp = create_bulk([item, {**item, "description": "again"}])
+    assert resp.status_code == 201
+    data = resp.json()
+    assert len(data) == 1
+    assert data[0]["description"] is None
+    assert list_addresses() == ["10.0.0.10"]
+
+
+def test_create_bulk_unknown_subnet_creates_nothing():
+    subnet_id = create_subnet("10.0.0.0/24")
+    resp = create_bulk(
+        [
+            {"address": "10.0.0.10", "subnet_id": subnet_id},
+            {"address": "10.0.1.10", "subnet_id": 999},
+        ]
+    )
+    assert resp.status_code == 404
+    assert list_addresses() == []
+
+
+def test_create_bulk_address_outside_subnet_creates_nothing():
+    subnet_id = create_subnet("10.0.0.0/24")
+    resp = create_bulk(
+        [
+            {"address": "10.0.0.10", "subnet_id": subnet_id},
+            {"address": "10.0.1.10", "subnet_id": subnet_id},
+        ]
+    )
+    assert resp.status_code == 400
+    assert "not within subnet" in resp.json()["detail"]
+    assert list_addresses() == []
+
+
+# -- Update -------------------------------------------------------------------
+
+
+def create_zone(name):
+    body = {"name": name, "soa": {"mname": f"ns1.{name}", "rname": f"admin.{name}"}}
+    resp = client.post("/dns-zones/", json=body)
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+
+def test_update_ip_unchanged():
+    create_zone("example.com")
+    subnet_id = create_subnet("10.0.0.0/24")
+    ip_id = create_ip(subnet_id, "10.0.0.10", dns_name="web.example.com", description="web")
+    before = client.get(f"/ip-addresses/{ip_id}").json()
+    resp = client.put(f"/ip-addresses/{ip_id}", json={"dns_name": "web.example.com", "description": "web"})
+    assert resp.status_code == 200
+    assert resp.json() == before
+    assert client.get(f"/ip-addresses/{ip_id}").json() == before
+
+
+# -- DNS zone membership ------------------------------------------------------
+
+
+def post_ip(subnet_id, address, dns_name):
+    return client.post("/ip-addresses/", json={"address": address, "subnet_id": subnet_id, "dns_name": dns_name})
+
+
+def test_dns_name_within_zone():
+    create_zone("example.com")
+    subnet_id = create_subnet("10.0.0.0/24")
+    assert post_ip(subnet_id, "10.0.0.1", "host.example.com").status_code == 201
+    assert post_ip(subnet_id, "10.0.0.2", "a.b.example.com").status_code == 201
+    assert post_ip(subnet_id, "10.0.0.3", "example.com.").status_code == 201
+    assert post_ip(subnet_id, "10.0.0.4", "notexample.com").status_code == 400
+
+
+def test_dns_name_follows_zone_rename():
+    zone_id = create_zone("example.com")
+    subnet_id = create_subnet("10.0.0.0/24")
+    assert post_ip(subnet_id, "10.0.0.1", "host.example.com").status_code == 201
+    client.put(f"/dns-zones/{zone_id}", json={"name": "other.com"})
+    assert post_ip(subnet_id, "10.0.0.2", "host.example.com").status_code == 400
+    assert post_ip(subnet_id, "10.0.0.3", "host.other.com").status_code == 201
+
+
+def test_dns_name_rejected_after_zone_delete():
+    zone_id = create_zone("example.com")
+    subnet_id = create_subnet("10.0.0.0/24")
+    assert post_ip(subnet_id, "10.0.0.1", "host.example.com").status_code == 201
+    client.delete(f"/dns-zones/{zone_id}")
+    resp = post_ip(subnet_id, "10.0.0.2", "host.example.com")
+    assert resp.status_code == 400
+    assert "does not belong" in resp.json()["detail"]
+
+
+def test_dns_name_accepted_after_bulk_zone_create():
+    subnet_id = create_subnet("10.0.0.0/24")
+    assert post_ip(subnet_id, "10.0.0.1", "host.example.com").status_code == 400
+    zones = [
+        {"name": name, "soa": {"mname": f"ns1.{name}", "rname": f"admin.{name}"}}
+        for name in ("example.com", "example.org")
+    ]
+    assert client.post("/dns-zones/bulk", json=zones).status_code == 201
+    assert post_ip(subnet_id, "10.0.0.1", "host.example.com").status_code == 201
+    assert post_ip(subnet_id, "10.0.0.2", "host.example.org").status_code == 201
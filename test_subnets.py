@@ -0,0 +1,290 @@
+import ipaddress
+
+from conftest import client, create_ip, create_subnet
+
+
+def contains(address, **params):
+    resp = client.get("/subnets/", params={"contains": address, "limit": 1000, **params})
+    assert resp.status_code == 200
+    return [subnet["cidr"] for subnet in resp.json()]
+
+
+def allocate(subnet_id):
+    return client.post(f"/subnets/{subnet_id}/allocate", json={})
+
+
+# -- Get ----------------------------------------------------------------------
+
+
+def get_subnet(cidr):
+    resp = client.get(f"/subnets/{create_subnet(cidr)}")
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_get_ipv4_fields():
+    data = get_subnet("10.0.0.0/24")
+    assert data["cidr"] == "10.0.0.0/24"
+    assert data["netmask"] == "255.255.255.0"
+    assert data["broadcast"] == "10.0.0.255"
+    assert (data["total_hosts"], data["usable_hosts"], data["free_count"]) == (256, 254, 254)
+    assert (data["first_usable"], data["last_usable"]) == ("10.0.0.1", "10.0.0.254")
+    assert data["is_ipv6"] is False
+
+
+def test_get_ipv4_slash31_and_slash32():
+    data = get_subnet("10.0.0.0/31")
+    assert (data["netmask"], data["broadcast"]) == ("255.255.255.254", "10.0.0.1")
+    assert (data["total_hosts"], data["usable_hosts"]) == (2, 2)
+    assert (data["first_usable"], data["last_usable"]) == ("10.0.0.0", "10.0.0.1")
+    data = get_subnet("10.0.0.7/32")
+    assert (data["netmask"], data["broadcast"]) == ("255.255.255.255", "10.0.0.7")
+    assert (data["total_hosts"], data["usable_hosts"]) == (1, 1)
+    assert (data["first_usable"], data["last_usable"]) == ("10.0.0.7", "10.0.0.7")
+
+
+def test_get_ipv6_fields():
+    data = get_subnet("2001:db8::/64")
+    assert data["netmask"] == "ffff:ffff:ffff:ffff::"
+    assert data["broadcast"] == "2001:db8::ffff:ffff:ffff:ffff"
+    assert (data["total_hosts"], data["usable_hosts"]) == (2**64, 2**64 - 2)
+    assert (data["first_usable"], data["last_usable"]) == ("2001:db8::1", "2001:db8::ffff:ffff:ffff:fffe")
+    assert data["is_ipv6"] is True
+    # Reported as before: only /128 counts every address as usable
+    data = get_subnet("2001:db8::/127")
+    assert (data["total_hosts"], data["usable_hosts"]) == (2, 0)
+    assert (data["first_usable"], data["last_usable"]) == ("2001:db8::1", "2001:db8::")
+    data = get_subnet("2001:db8::5/128")
+    assert (data["netmask"], data["broadcast"]) == ("ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff", "2001:db8::5")
+    assert (data["total_hosts"], data["usable_hosts"]) == (1, 1)
+    assert (data["first_usable"], data["last_usable"]) == ("2001:db8::5", "2001:db8::5")
+
+
+def test_get_counts_after_allocation():
+    subnet_id = create_subnet("10.0.0.0/29")
+    allocate(subnet_id)
+    allocate(subnet_id)
+    data = client.get(f"/subnets/{subnet_id}").json()
+    assert (data["allocated_count"], data["free_count"]) == (2, 4)
+    listed = client.get("/subnets/").json()
+    assert (listed[0]["allocated_count"], listed[0]["free_count"]) == (2, 4)
+
+
+def test_get_subnet_not_found():
+    assert client.get("/subnets/999").status_code == 404
+
+
+# -- Uniqueness ---------------------------------------------------------------
+
+
+def test_create_duplicate_with_host_bits():
+    create_subnet("10.0.0.0/24")
+    resp = client.post("/subnets/", json={"name": "dup", "cidr": "10.0.0.7/24"})
+    assert resp.status_code == 409
+
+
+def test_create_ipv4_and_ipv6_default_routes():
+    create_subnet("0.0.0.0/0")
+    create_subnet("::/0")
+    for cidr in ("0.0.0.0/0", "::/0"):
+        assert client.post("/subnets/", json={"name": "dup", "cidr": cidr}).status_code == 409
+    resp = client.get("/subnets/", params={"cidr": "0.0.0.0/0"})
+    assert [subnet["cidr"] for subnet in resp.json()] == ["0.0.0.0/0"]
+
+
+def test_allocate_address_taken_in_enclosing_subnet():
+    outer_id = create_subnet("10.0.0.0/24")
+    create_ip(outer_id, "10.0.0.1")
+    inner_id = create_subnet("10.0.0.0/25")
+    resp = allocate(inner_id)
+    assert resp.status_code == 409
+    assert "already exists" in resp.json()["detail"]
+
+
+# -- List: contains -----------------------------------------------------------
+
+
+NESTED_V4 = [str(ipaddress.ip_network(f"10.1.2.3/{prefix}", strict=False)) for prefix in range(33)]
+
+
+def test_list_contains_nested_ipv4():
+    for cidr in ["10.1.2.4/32", "11.0.0.0/8", "10.1.3.0/24"] + NESTED_V4:
+        create_subnet(cidr)
+    assert contains("10.1.2.3") == NESTED_V4
+    assert contains("10.1.2.4") == ["10.1.2.4/32"] + NESTED_V4[:30]
+    assert contains("192.168.0.1") == ["0.0.0.0/0"]
+
+
+def test_list_contains_ipv6():
+    for cidr in ("::/0", "2001:db8::/32", "2001:db8::1/128", "2001:db9::/32", "0.0.0.0/0"):
+        create_subnet(cidr)
+    assert contains("2001:db8::1") == ["::/0", "2001:db8::/32", "2001:db8::1/128"]
+    assert contains("2001:db8::2") == ["::/0", "2001:db8::/32"]
+    assert contains("fe80::1") == ["::/0"]
+
+
+def test_list_contains_ipv4_mapped_does_not_match_ipv4():
+    for cidr in ("0.0.0.0/0", "10.0.0.0/8"):
+        create_subnet(cidr)
+    assert contains("::ffff:10.1.2.3") == []
+
+
+def test_list_contains_invalid():
+    for value in ("bad", "10.0.0.0/24", "10.0.0.256"):
+        resp = client.get("/subnets/", params={"contains": value})
+        assert resp.status_code == 400
+
+
+def test_list_contains_pagination():
+    for cidr in NESTED_V4:
+        create_subnet(cidr)
+    assert contains("10.1.2.3", offset=5, limit=3) == NESTED_V4[5:8]
+    assert contains("10.1.2.3", offset=30) == NESTED_V4[30:]
+
+
+# -- Allocate -----------------------------------------------------------------
+
+
+def test_allocate_sequential():
+    subnet_id = create_subnet("10.0.0.0/24")
+    assert allocate(subnet_id).json()["address"] == "10.0.0.1"
+    assert allocate(subnet_id).json()["address"] == "10.0.0.2"
+
+
+def test_allocate_fills_lowest_hole_first():
+    subnet_id = create_subnet("10.0.0.0/29")
+    for address in ("10.0.0.1", "10.0.0.2", "10.0.0.4", "10.0.0.6"):
+        create_ip(subnet_id, address)
+    assert allocate(subnet_id).json()["address"] == "10.0.0.3"
+    assert allocate(subnet_id).json()["address"] == "10.0.0.5"
+
+
+def test_allocate_hole_at_start():
+    subnet_id = create_subnet("10.0.0.0/29")
+    for address in ("10.0.0.2", "10.0.0.3"):
+        create_ip(subnet_id, address)
+    assert allocate(subnet_id).json()["address"] == "10.0.0.1"
+    assert allocate(subnet_id).json()["address"] == "10.0.0.4"
+
+
+def test_allocate_reuses_deleted_address():
+    subnet_id = create_subnet("10.0.0.0/24")
+    ids = [allocate(subnet_id).json()["id"] for _ in range(5)]
+    client.delete(f"/ip-addresses/{ids[2]}")
+    assert allocate(subnet_id).json()["address"] == "10.0.0.3"
+    assert allocate(subnet_id).json()["address"] == "10.0.0.6"
+
+
+def test_allocate_full_subnet():
+    subnet_id = create_subnet("10.0.0.0/29")
+    addresses = [allocate(subnet_id).json()["address"] for _ in range(6)]
+    assert addresses == [f"10.0.0.{i}" for i in range(1, 7)]
+    resp = allocate(subnet_id)
+    assert resp.status_code == 409
+    assert "No free IP addresses" in resp.json()["detail"]
+
+
+def test_allocate_slash31():
+    subnet_id = create_subnet("10.0.0.0/31")
+    assert allocate(subnet_id).json()["address"] == "10.0.0.0"
+    assert allocate(subnet_id).json()["address"] == "10.0.0.1"
+    assert allocate(subnet_id).status_code == 409
+
+
+def test_allocate_slash32():
+    subnet_id = create_subnet("10.0.0.7/32")
+    assert allocate(subnet_id).json()["address"] == "10.0.0.7"
+    assert allocate(subnet_id).status_code == 409
+
+
+def test_allocate_ipv6():
+    subnet_id = create_subnet("2001:db8::/64")
+    create_ip(subnet_id, "2001:db8::2")
+    first = allocate(subnet_id).json()
+    assert first["address"] == "2001:db8::1"
+    assert first["is_ipv6"] is True
+    assert allocate(subnet_id).json()["address"] == "2001:db8::3"
+
+
+def test_allocate_ipv6_slash127():
+    subnet_id = create_subnet("2001:db8::/127")
+    assert allocate(subnet_id).json()["address"] == "2001:db8::"
+    assert allocate(subnet_id).json()["address"] == "2001:db8::1"
+    assert allocate(subnet_id).status_code == 409
+
+
+def test_allocate_ipv6_slash128():
+    subnet_id = create_subnet("2001:db8::5/128")
+    assert allocate(subnet_id).json()["address"] == "2001:db8::5"
+    assert allocate(subnet_id).status_code == 409
+
+
+def test_allocate_subnet_not_found():
+    assert allocate(999).status_code == 404
+
+
+# -- Allocate batch -----------------------------------------------------------
+
+
+def allocate_batch(subnet_id, count, **body):
+    return client.post(f"/subnets/{subnet_id}/allocate-batch", params={"count": count}, json=body)
+
+
+def test_allocate_batch():
+    subnet_id = create_subnet("10.0.0.0/24")
+    resp = allocate_batch(subnet_id, 3, description="rack 1")
+    assert resp.status_code == 201
+    data = resp.json()
+    assert [ip["address"] for ip in data] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+    assert all(ip["description"] == "rack 1" and ip["subnet_id"] == subnet_id for ip in data)
+    assert len(client.get("/ip-addresses/", params={"subnet_id": subnet_id}).json()) == 3
+
+
+def test_allocate_batch_fills_holes_then_tail():
+    subnet_id = create_subnet("10.0.0.0/28")
+    for address in ("10.0.0.1", "10.0.0.3", "10.0.0.4", "10.0.0.7"):
+        create_ip(subnet_id, address)
+    resp = allocate_batch(subnet_id, 5)
+    assert resp.status_code == 201
+    assert [ip["address"] for ip in resp.json()] == [
+        "10.0.0.2",
+        "10.0.0.5",
+        "10.0.0.6",
+        "10.0.0.8",
+        "10.0.0.9",
+    ]
+
+
+def test_allocate_batch_too_few_free_creates_nothing():
+    subnet_id = create_subnet("10.0.0.0/29")
+    create_ip(subnet_id, "10.0.0.3")
+    resp = allocate_batch(subnet_id, 6)
+    assert resp.status_code == 409
+    assert "Only 5 free" in resp.json()["detail"]
+    assert len(client.get("/ip-addresses/", params={"subnet_id": subnet_id}).json()) == 1
+
+
+def test_allocate_batch_exactly_fills_subnet():
+    subnet_id = create_subnet("10.0.0.0/29")
+    assert len(allocate_batch(subnet_id, 6).json()) == 6
+    assert allocate_batch(subnet_id, 1).status_code == 409
+
+
+def test_allocate_batch_count_bounds():
+    subnet_id = create_subnet("10.0.0.0/16")
+    assert allocate_batch(subnet_id, 0).status_code == 422
+    assert allocate_batch(subnet_id, 1001).status_code == 422
+    assert client.post(f"/subnets/{subnet_id}/allocate-batch", json={}).status_code == 422
+    assert len(allocate_batch(subnet_id, 1000).json()) == 1000
+
+
+def test_allocate_batch_subnet_not_found():
+    assert allocate_batch(999, 1).status_code == 404
+
+
+def test_allocate_batch_dns_name_outside_zones():
+    subnet_id = create_subnet("10.0.0.0/24")
+    resp = allocate_batch(subnet_id, 2, dns_name="host.nozone.test")
+    assert resp.status_code == 400
+    assert "does not belong" in resp.json()["detail"]
+    assert client.get("/ip-addresses/", params={"subnet_id": subnet_id}).json() == []